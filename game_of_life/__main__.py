@@ -1,10 +1,44 @@
 from argparse import ArgumentParser
-from random import SystemRandom
+from functools import partial
 from time import perf_counter
 
-import cv2 as cv
-import matplotlib.pyplot as plt
-from numpy import array, floor, log2, ndarray
+from numpy import (
+    array,
+    bitwise_or,
+    empty,
+    empty_like,
+    floor,
+    left_shift,
+    load,
+    multiply,
+    ndarray,
+    packbits,
+    savez,
+    take,
+    uint8,
+    unpackbits,
+    zeros,
+)
+from numpy.random import default_rng
+from scipy.ndimage import convolve
+
+from game_of_life.hashlife import HashLife
+
+ALGORITHMS = ("jit", "convolve", "bitpack", "hashlife")
+DEVICES = ("cpu", "cuda")
+# `rule_bits` of B3/S23, which has a specialized kernel
+CONWAY_RULE_BITS = 1 << (2 * 3) | 1 << (2 * 2 + 1) | 1 << (2 * 3 + 1)
+DISPLAY_SIZE = (1024, 1024)
+# Generations between window title refreshes
+TITLE_INTERVAL = 10
+
+
+def rule_bits(birth_mask: ndarray, survive_mask: ndarray) -> int:
+    # Bit `2 * alive_count + alive` holds the next state of a cell
+    bits = 0
+    for count in range(9):
+        bits |= int(birth_mask[count]) << (2 * count) | int(survive_mask[count]) << (2 * count + 1)
+    return bits
 
 
 class Game:
@@ -17,92 +51,182 @@ class Game:
         birth_rule: list[int] = None,
         survive_rule: list[int] = None,
         visualize: bool = True,
+        algorithm: str = None,
+        seed: int = None,
+        device: str = "cpu",
     ):
-        random = SystemRandom()
-        plt.style.use("seaborn")
-        plt.rcParams.update(
-            {
-                "figure.figsize": (5, 5),
-                "figure.dpi": 200,
-            }
-        )
-
-        if log2(size) % 1 != 0:
+        if size < 1 or size & (size - 1):
             raise ValueError(f"`size` must be an integer power of 2 (got {size})")
+        if device not in DEVICES:
+            raise ValueError(f"`device` must be one of {', '.join(DEVICES)} (got {device})")
+        if device == "cuda" and algorithm is not None:
+            raise ValueError(f"`algorithm` can't be set on the cuda device (got {algorithm})")
+        if device == "cuda":
+            algorithm = "cuda"
+        elif algorithm is None:
+            algorithm = "jit"
+        elif algorithm not in ALGORITHMS:
+            raise ValueError(f"`algorithm` must be one of {', '.join(ALGORITHMS)} (got {algorithm})")
+        if algorithm == "bitpack" and size < 64:
+            raise ValueError(f"`size` must be at least 64 for the bitpack algorithm (got {size})")
+        if algorithm == "hashlife" and size < 2:
+            raise ValueError(f"`size` must be at least 2 for the hashlife algorithm (got {size})")
         if birth_rule is None:
             birth_rule = [3]
         if survive_rule is None:
             survive_rule = [2, 3]
+        if any(not 0 <= count <= 8 for count in [*birth_rule, *survive_rule]):
+            raise ValueError(f"Rule neighbor counts must be between 0 and 8 (got B{birth_rule}/S{survive_rule})")
         if initial_universe is None:
-            initial_universe = array([random.random() > threshold for _ in range(size**2)]).reshape((size, size))
+            initial_universe = default_rng(seed).random((size, size)) > threshold
+        if initial_universe.shape != (size, size):
+            raise ValueError(f"`initial_universe` must have shape ({size}, {size}) (got {initial_universe.shape})")
 
         self.generation = 1
         self.N = size
+        # `size` is a power of 2, so `x & self._mask` wraps like `x % size`
+        self._mask = size - 1
         self.fps = fps
         self.visualize = visualize
         self.birth_rule = birth_rule
         self.survive_rule = survive_rule
-        self.universe: ndarray = initial_universe.astype("bool")
+        self.algorithm = algorithm
+        self.device = device
+        self._a: ndarray = (initial_universe != 0).astype(uint8)
+        self._birth_mask = zeros(9, dtype="bool")
+        self._birth_mask[birth_rule] = True
+        self._survive_mask = zeros(9, dtype="bool")
+        self._survive_mask[survive_rule] = True
+        if self.algorithm == "jit":
+            # Imported only when used, so the other algorithms don't pay for importing Numba
+            from game_of_life.kernels import fill_halo, step_b3s23, step_jit
+
+            padded = zeros((size + 2, size + 2), dtype=uint8)
+            padded[1:-1, 1:-1] = self._a
+            fill_halo(padded)
+            self._a = padded
+            self._b = empty_like(self._a)
+            self._rule_bits = rule_bits(self._birth_mask, self._survive_mask)
+            # Compile the kernel up front so the first generation isn't charged for it
+            if self._rule_bits == CONWAY_RULE_BITS:
+                step_b3s23(zeros((3, 3), dtype=uint8), empty((3, 3), dtype=uint8))
+                self._step = step_b3s23
+            else:
+                step_jit(zeros((3, 3), dtype=uint8), empty((3, 3), dtype=uint8), self._rule_bits)
+                self._step = partial(step_jit, rule=self._rule_bits)
+        elif self.algorithm == "bitpack":
+            from game_of_life.kernels import pack_rows, step_bitpacked, unpack_rows
+
+            self._packed = pack_rows(self._a)
+            self._packed_next = empty_like(self._packed)
+            self._step = partial(step_bitpacked, birth_mask=self._birth_mask, survive_mask=self._survive_mask)
+            self._unpack_rows = unpack_rows
+        elif self.algorithm == "hashlife":
+            self._hashlife = HashLife(self._birth_mask, self._survive_mask)
+            self._root = self._hashlife.from_array(self._a)
+        elif self.device == "cuda":
+            try:
+                import cupy
+            except ImportError as error:
+                raise ImportError("The cuda device needs CuPy, which the `cuda` extra installs") from error
+
+            from game_of_life.cuda import step_cuda
+
+            self._a = cupy.asarray(self._a)
+            self._b = cupy.empty_like(self._a)
+            self._step = partial(step_cuda, mask=self._mask, rule=rule_bits(self._birth_mask, self._survive_mask))
+        else:
+            self._b = empty_like(self._a)
+            self._kernel = array([[1, 1, 1], [1, 0, 1], [1, 1, 1]], dtype=uint8)
+            self._nbuf = empty((size, size), dtype=uint8)
+            # Indexed by `2 * alive_count + alive`
+            self._rule = array([self._birth_mask, self._survive_mask], dtype=uint8).T.ravel()
         self.last_time = perf_counter()
         self.last_fps = 0
         self.window = "game"
 
         if self.visualize:
+            # Deferred so headless runs don't pay for importing the GUI stack
+            import cv2 as cv
+
             cv.namedWindow(self.window, cv.WINDOW_NORMAL)
-            cv.resizeWindow(self.window, 1024, 1024)
+            cv.resizeWindow(self.window, *DISPLAY_SIZE)
+            self._frame = empty((size, size), dtype=uint8)
+            self._display = empty(DISPLAY_SIZE, dtype=uint8)
 
-    def evaluate_life(self, current_cell: bool, alive_count: int):
-        return (current_cell and alive_count in self.survive_rule) or (
-            not current_cell and alive_count in self.birth_rule
-        )
+    @property
+    def universe(self) -> ndarray:
+        if self.algorithm == "jit":
+            return self._a[1:-1, 1:-1].view("bool")
+        if self.algorithm == "bitpack":
+            return self._unpack_rows(self._packed)
+        if self.algorithm == "hashlife":
+            return self._hashlife.to_array(self._root)
+        if self.device == "cuda":
+            return self._a.get().view("bool")
+        return self._a.view("bool")
 
     def update(self):
-        N = self.N
-        previous_universe = self.universe
-        universe = self.universe.copy()
-        for j in range(N):
-            pure_north = (j + 1) % N
-            pure_south = (j - 1) % N
-            for i in range(N):
-                pure_east = (i + 1) % N
-                pure_west = (i - 1) % N
-                neighbors = [
-                    (pure_north, i),  # N
-                    (pure_south, i),  # S
-                    (j, pure_east),  # E
-                    (j, pure_west),  # W
-                    (pure_north, pure_west),  # NW
-                    (pure_north, pure_east),  # NE
-                    (pure_south, pure_west),  # SW
-                    (pure_south, pure_east),  # SE
-                ]
-                state = [previous_universe[nb] for nb in neighbors]
-                alive_count = len([s for s in state if s])
-                current_cell = previous_universe[j, i]
-                universe[j, i] = self.evaluate_life(current_cell, alive_count)
-        self.universe = universe
+        if self.algorithm == "jit":
+            self._step(self._a, self._b)
+            self._a, self._b = self._b, self._a
+        elif self.algorithm == "bitpack":
+            self._step(self._packed, self._packed_next)
+            self._packed, self._packed_next = self._packed_next, self._packed
+        elif self.algorithm == "hashlife":
+            self._root = self._hashlife.step(self._root)
+        elif self.device == "cuda":
+            self._step(self._a, self._b)
+            self._a, self._b = self._b, self._a
+        else:
+            convolve(self._a, self._kernel, output=self._nbuf, mode="wrap")
+            left_shift(self._nbuf, 1, out=self._nbuf)
+            bitwise_or(self._nbuf, self._a, out=self._nbuf)
+            take(self._rule, self._nbuf, out=self._b)
+            self._a, self._b = self._b, self._a
         self.last_fps = int(floor(1 / (perf_counter() - self.last_time)))
         self.last_time = perf_counter()
         self.generation += 1
 
+    @classmethod
+    def from_checkpoint(cls, path: str, **kwargs) -> "Game":
+        with load(path) as checkpoint:
+            size = int(checkpoint["size"])
+            universe = unpackbits(checkpoint["universe"], count=size**2).reshape((size, size))
+            game = cls(size=size, initial_universe=universe, **kwargs)
+            game.generation = int(checkpoint["generation"])
+        return game
+
+    def save(self, path: str):
+        # One bit per cell on disk
+        savez(path, universe=packbits(self.universe), size=self.N, generation=self.generation)
+
     def run(self):
         if self.visualize:
+            import cv2 as cv
+
             while True:
                 self.update()
-                cv.imshow(self.window, self.universe.astype("uint8") * 255)
-                cv.setWindowTitle(self.window, f"{self.window} - {self.last_fps} FPS / Gen {self.generation}")
+                multiply(self.universe.view(uint8), 255, out=self._frame)
+                cv.resize(self._frame, DISPLAY_SIZE, dst=self._display, interpolation=cv.INTER_NEAREST)
+                cv.imshow(self.window, self._display)
+                if self.generation % TITLE_INTERVAL == 0:
+                    cv.setWindowTitle(self.window, f"{self.window} - {self.last_fps} FPS / Gen {self.generation}")
                 key = cv.waitKey(1) & 0xFF
                 if key == ord("q"):
                     break
+                if key == ord("s"):
+                    self.save(f"{self.window}-{self.generation}.npz")
             cv.destroyAllWindows()
         else:
             last_gen = self.generation
+            last_report = perf_counter()
             while True:
                 self.update()
-                if (perf_counter() - self.last_time) >= 1:
+                if (perf_counter() - last_report) >= 1:
                     print(f"{self.generation - last_gen} gen/s")
                     last_gen = self.generation
-                    self.last_time = perf_counter()
+                    last_report = perf_counter()
 
 
 if __name__ == "__main__":
@@ -112,10 +236,17 @@ if __name__ == "__main__":
     )
     parser.add_argument("-t", "--threshold", help="Random initializer threshold", type=float, default=0.93)
     parser.add_argument("-r", "--rulestring", help="Rulestring to use. Uses CGOL default (B3/S23)", default="B3/S23")
+    parser.add_argument("-a", "--algorithm", help="Stepping algorithm to use", choices=ALGORITHMS)
+    parser.add_argument(
+        "-d", "--device", help="Device to step the universe on (cuda is experimental)", choices=DEVICES, default="cpu"
+    )
+    parser.add_argument("--seed", help="Seed for the random initializer", type=int)
+    parser.add_argument("-l", "--load", help="Resume from a checkpoint saved with the `s` key")
+    parser.add_argument("--no-visualize", help="Run headless and report gen/s", action="store_true")
     parser.add_argument("--fps", help="Requested FPS", type=float, default=23.976)
     args = parser.parse_args()
 
-    if log2(args.size) % 1 != 0:
+    if args.size < 1 or args.size & (args.size - 1):
         raise ValueError(f"`--size` must be an integer power of 2 (got {args.size})")
 
     birth_string, survive_string = args.rulestring.split("/")
@@ -124,10 +255,16 @@ if __name__ == "__main__":
     birth_rule = [int(b) for b in birth_string]
     survive_rule = [int(s) for s in survive_string]
 
-    Game(
-        size=args.size,
-        threshold=args.threshold,
-        fps=args.fps,
-        birth_rule=birth_rule,
-        survive_rule=survive_rule,
-    ).run()
+    options = {
+        "fps": args.fps,
+        "visualize": not args.no_visualize,
+        "birth_rule": birth_rule,
+        "survive_rule": survive_rule,
+        "algorithm": args.algorithm,
+        "device": args.device,
+    }
+    if args.load is None:
+        game = Game(size=args.size, threshold=args.threshold, seed=args.seed, **options)
+    else:
+        game = Game.from_checkpoint(args.load, **options)
+    game.run()
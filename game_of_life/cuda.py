@@ -0,0 +1,25 @@
+import cupy
+
+# Counts neighbors and applies the rule in one pass, so the counts never round-trip through global memory
+step_fused = cupy.ElementwiseKernel(
+    "raw uint8 prev, int32 mask, uint32 rule",
+    "uint8 next_alive",
+    """
+    const int size = mask + 1;
+    const int row = i / size;
+    const int col = i & mask;
+    const int north = ((row - 1) & mask) * size;
+    const int centre = row * size;
+    const int south = ((row + 1) & mask) * size;
+    const int west = (col - 1) & mask;
+    const int east = (col + 1) & mask;
+    const int alive_count = prev[north + west] + prev[north + col] + prev[north + east] + prev[centre + west]
+        + prev[centre + east] + prev[south + west] + prev[south + col] + prev[south + east];
+    next_alive = (rule >> (2 * alive_count + prev[i])) & 1;
+    """,
+    "step_fused",
+)
+
+
+def step_cuda(prev: cupy.ndarray, nxt: cupy.ndarray, mask: int, rule: int):
+    step_fused(prev, cupy.int32(mask), cupy.uint32(rule), nxt)
@@ -0,0 +1,155 @@
+from numpy import arange, ndarray, uint16, zeros
+
+# Canonical nodes and memoized results are dropped past this many nodes to bound memory
+CACHE_LIMIT = 1 << 22
+
+
+class QuadNode:
+    __slots__ = ("level", "nw", "ne", "sw", "se", "population")
+
+    def __init__(self, level: int, nw, ne, sw, se, population: int):
+        self.level = level
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.population = population
+
+
+class HashLife:
+    def __init__(self, birth_mask: ndarray, survive_mask: ndarray):
+        self._nodes: dict[tuple, QuadNode] = {}
+        self._results: dict[tuple[QuadNode, int], QuadNode] = {}
+        self._cells = (QuadNode(0, None, None, None, None, 0), QuadNode(0, None, None, None, None, 1))
+        self._empty = [self._cells[0]]
+        self._leaf_results = self._build_leaf_results(birth_mask, survive_mask)
+        # Under B0 rules empty space comes alive, so empty nodes can't be short-circuited
+        self._empty_stays_empty = not birth_mask[0]
+
+    @staticmethod
+    def _build_leaf_results(birth_mask: ndarray, survive_mask: ndarray) -> ndarray:
+        # Maps every 4x4 block, bit `4 * row + col`, to the next state of its centre 2x2, bit `2 * row + col`
+        blocks = arange(1 << 16, dtype=uint16)
+        results = zeros(1 << 16, dtype=uint16)
+        for row in (1, 2):
+            for col in (1, 2):
+                alive_count = zeros(1 << 16, dtype=uint16)
+                for dj in (-1, 0, 1):
+                    for di in (-1, 0, 1):
+                        if dj or di:
+                            alive_count += (blocks >> (4 * (row + dj) + col + di)) & 1
+                alive = ((blocks >> (4 * row + col)) & 1).astype("bool")
+                next_alive = survive_mask[alive_count] & alive | birth_mask[alive_count] & ~alive
+                results |= next_alive.astype(uint16) << (2 * (row - 1) + col - 1)
+        return results
+
+    def node(self, nw: QuadNode, ne: QuadNode, sw: QuadNode, se: QuadNode) -> QuadNode:
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            population = nw.population + ne.population + sw.population + se.population
+            node = self._nodes[key] = QuadNode(nw.level + 1, nw, ne, sw, se, population)
+        return node
+
+    def empty(self, level: int) -> QuadNode:
+        while len(self._empty) <= level:
+            smaller = self._empty[-1]
+            self._empty.append(self.node(smaller, smaller, smaller, smaller))
+        return self._empty[level]
+
+    def centre(self, node: QuadNode) -> QuadNode:
+        return self.node(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def from_array(self, cells: ndarray) -> QuadNode:
+        size = cells.shape[0]
+        if size == 1:
+            return self._cells[int(cells[0, 0])]
+        level = size.bit_length() - 1
+        if not cells.any():
+            return self.empty(level)
+        half = size // 2
+        return self.node(
+            self.from_array(cells[:half, :half]),
+            self.from_array(cells[:half, half:]),
+            self.from_array(cells[half:, :half]),
+            self.from_array(cells[half:, half:]),
+        )
+
+    def to_array(self, node: QuadNode) -> ndarray:
+        cells = zeros((1 << node.level, 1 << node.level), dtype="bool")
+        self._fill(node, cells, 0, 0)
+        return cells
+
+    def _fill(self, node: QuadNode, cells: ndarray, j: int, i: int):
+        if node.population == 0:
+            return
+        if node.level == 0:
+            cells[j, i] = True
+            return
+        half = 1 << (node.level - 1)
+        self._fill(node.nw, cells, j, i)
+        self._fill(node.ne, cells, j, i + half)
+        self._fill(node.sw, cells, j + half, i)
+        self._fill(node.se, cells, j + half, i + half)
+
+    def _leaf_successor(self, node: QuadNode) -> QuadNode:
+        block = 0
+        for offset, quadrant in ((0, node.nw), (2, node.ne), (8, node.sw), (10, node.se)):
+            block |= (
+                quadrant.nw.population << offset
+                | quadrant.ne.population << (offset + 1)
+                | quadrant.sw.population << (offset + 4)
+                | quadrant.se.population << (offset + 5)
+            )
+        result = int(self._leaf_results[block])
+        cells = self._cells
+        return self.node(cells[result & 1], cells[(result >> 1) & 1], cells[(result >> 2) & 1], cells[result >> 3])
+
+    def successor(self, node: QuadNode, j: int) -> QuadNode:
+        # Gosper's algorithm: the centre half of `node`, 2**j generations on, for j <= node.level - 2
+        if node.population == 0 and self._empty_stays_empty:
+            return node.nw
+        key = (node, j)
+        result = self._results.get(key)
+        if result is not None:
+            return result
+
+        if node.level == 2:
+            result = self._leaf_successor(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            c1 = self.successor(nw, j)
+            c2 = self.successor(self.node(nw.ne, ne.nw, nw.se, ne.sw), j)
+            c3 = self.successor(ne, j)
+            c4 = self.successor(self.node(nw.sw, nw.se, sw.nw, sw.ne), j)
+            c5 = self.successor(self.node(nw.se, ne.sw, sw.ne, se.nw), j)
+            c6 = self.successor(self.node(ne.sw, ne.se, se.nw, se.ne), j)
+            c7 = self.successor(sw, j)
+            c8 = self.successor(self.node(sw.ne, se.nw, sw.se, se.sw), j)
+            c9 = self.successor(se, j)
+            if j < node.level - 2:
+                # The sub-results already cover all 2**j generations, so only re-centre them
+                result = self.node(
+                    self.node(c1.se, c2.sw, c4.ne, c5.nw),
+                    self.node(c2.se, c3.sw, c5.ne, c6.nw),
+                    self.node(c4.se, c5.sw, c7.ne, c8.nw),
+                    self.node(c5.se, c6.sw, c8.ne, c9.nw),
+                )
+            else:
+                result = self.node(
+                    self.successor(self.node(c1, c2, c4, c5), j),
+                    self.successor(self.node(c2, c3, c5, c6), j),
+                    self.successor(self.node(c4, c5, c7, c8), j),
+                    self.successor(self.node(c5, c6, c8, c9), j),
+                )
+        self._results[key] = result
+        return result
+
+    def step(self, root: QuadNode) -> QuadNode:
+        if len(self._nodes) > CACHE_LIMIT:
+            self._nodes.clear()
+            self._results.clear()
+        # Tiling the torus 2x2 gives a node whose successor is the next generation shifted by half the board;
+        # tiling that again and taking its centre shifts it back
+        shifted = self.successor(self.node(root, root, root, root), 0)
+        return self.centre(self.node(shifted, shifted, shifted, shifted))